@@ -4,6 +4,7 @@ UniversalSMARTAgent - Cross-platform agent for Windows, Linux, and macOS
 Detects platform-specific information and broadcasts to SMART-Admin
 """
 
+import asyncio
 import json
 import socket
 import time
@@ -12,13 +13,64 @@ import threading
 import logging
 import os
 import subprocess
+import functools
 import shutil
 import psutil
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger('UniversalSMARTAgent')
 
+def _fast_run(args: List[str], **kwargs) -> subprocess.CompletedProcess:
+    """subprocess.run with agent defaults that let CPython use posix_spawn on Linux/macOS"""
+    kwargs.setdefault('close_fds', False)
+    kwargs.setdefault('capture_output', True)
+    kwargs.setdefault('text', True)
+    kwargs.setdefault('timeout', 5)
+    # posix_spawn is only used when the executable path contains a directory
+    executable = shutil.which(args[0])
+    if executable:
+        args = [executable] + list(args[1:])
+    return subprocess.run(args, **kwargs)
+
+@functools.lru_cache(maxsize=None)
+def _probe_hardware() -> Tuple[int, int, float, float]:
+    """Probe CPU/RAM/disk totals once - they do not change for the life of the process"""
+    cpu_cores = psutil.cpu_count(logical=False) or psutil.cpu_count()
+    if not cpu_cores:
+        raise RuntimeError("Could not detect CPU core count")
+    
+    cpu_threads = psutil.cpu_count() or cpu_cores
+    
+    # Memory in GB
+    memory_bytes = psutil.virtual_memory().total
+    if not memory_bytes:
+        raise RuntimeError("Could not detect memory size")
+    memory_gb = round(memory_bytes / (1024**3), 1)
+    
+    # Storage in GB (main disk) - required, no fallback
+    if platform.system() == 'Windows':
+        storage = shutil.disk_usage('C:\\\\')
+    else:
+        storage = shutil.disk_usage('/')
+    storage_gb = round(storage.total / (1024**3), 0)
+    
+    if not storage_gb:
+        raise RuntimeError("Could not detect storage size")
+    
+    return cpu_cores, cpu_threads, memory_gb, storage_gb
+
+class _BroadcastProtocol(asyncio.DatagramProtocol):
+    """Datagram protocol for one broadcast interface - surfaces send errors the transport swallows"""
+    
+    def __init__(self, iface: Dict):
+        self.iface = iface
+        self.last_error: Optional[Exception] = None
+    
+    def error_received(self, exc: Exception):
+        self.last_error = exc
+        logger.debug(f"Broadcast error on {self.iface['interface']}: {exc}")
+
 class UniversalSMARTAgent:
     """Universal agent that works on Windows, Linux, and macOS"""
     
@@ -176,7 +228,7 @@ class UniversalSMARTAgent:
             
             # Fallback methods
             try:
-                result = subprocess.run(['lsb_release', '-d'], capture_output=True, text=True)
+                result = _fast_run(['lsb_release', '-d'])
                 if result.returncode == 0:
                     return result.stdout.split(':', 1)[1].strip()
             except:
@@ -190,7 +242,7 @@ class UniversalSMARTAgent:
     def get_macos_version(self) -> str:
         """Get macOS version information"""
         try:
-            result = subprocess.run(['sw_vers'], capture_output=True, text=True)
+            result = _fast_run(['sw_vers'])
             if result.returncode == 0:
                 lines = result.stdout.strip().split('\n')
                 version_info = {}
@@ -227,10 +279,40 @@ class UniversalSMARTAgent:
         
         try:
             if system == 'windows':
+                # Method 0: Read SMBIOS values straight from the registry (no process spawn)
+                try:
+                    import winreg
+                    key = winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE,
+                                       r"HARDWARE\DESCRIPTION\System\BIOS")
+                    try:
+                        bios_values = {}
+                        for value_name in ('BaseBoardManufacturer', 'BaseBoardProduct',
+                                           'SystemManufacturer', 'SystemProductName'):
+                            try:
+                                bios_values[value_name] = str(winreg.QueryValueEx(key, value_name)[0]).strip()
+                            except:
+                                bios_values[value_name] = ''
+                    finally:
+                        winreg.CloseKey(key)
+                
+                    manufacturer = bios_values['BaseBoardManufacturer']
+                    product = bios_values['BaseBoardProduct']
+                    if manufacturer and product and product not in generic_values:
+                        return f"{manufacturer} {product}"
+                
+                    manufacturer = bios_values['SystemManufacturer']
+                    model = bios_values['SystemProductName']
+                    if (manufacturer and model and
+                        manufacturer not in generic_values and
+                        model not in generic_values and
+                        len(manufacturer) > 2 and len(model) > 2):
+                        return f"{manufacturer} {model}"
+                except:
+                    pass
+                
                 # Method 1: Try WMIC for BaseBoard (motherboard) info first
                 try:
-                    result = subprocess.run(['wmic', 'baseboard', 'get', 'manufacturer,product', '/value'], 
-                                          capture_output=True, text=True, timeout=10)
+                    result = _fast_run(['wmic', 'baseboard', 'get', 'manufacturer,product', '/value'], timeout=10)
                     if result.returncode == 0:
                         manufacturer = ''
                         product = ''
@@ -248,8 +330,7 @@ class UniversalSMARTAgent:
                 
                 # Method 2: Try computer system info with better validation
                 try:
-                    result = subprocess.run(['wmic', 'computersystem', 'get', 'manufacturer,model', '/value'], 
-                                          capture_output=True, text=True, timeout=10)
+                    result = _fast_run(['wmic', 'computersystem', 'get', 'manufacturer,model', '/value'], timeout=10)
                     if result.returncode == 0:
                         manufacturer = ''
                         model = ''
@@ -271,8 +352,7 @@ class UniversalSMARTAgent:
                 
                 # Method 3: Try BIOS info as fallback
                 try:
-                    result = subprocess.run(['wmic', 'bios', 'get', 'manufacturer', '/value'], 
-                                          capture_output=True, text=True, timeout=10)
+                    result = _fast_run(['wmic', 'bios', 'get', 'manufacturer', '/value'], timeout=10)
                     if result.returncode == 0:
                         for line in result.stdout.split('\n'):
                             line = line.strip()
@@ -281,8 +361,7 @@ class UniversalSMARTAgent:
                                 if bios_manufacturer not in generic_values and len(bios_manufacturer) > 2:
                                     # Try to get system model for BIOS manufacturer
                                     try:
-                                        result2 = subprocess.run(['wmic', 'computersystem', 'get', 'model', '/value'], 
-                                                              capture_output=True, text=True, timeout=10)
+                                        result2 = _fast_run(['wmic', 'computersystem', 'get', 'model', '/value'], timeout=10)
                                         if result2.returncode == 0:
                                             for line2 in result2.stdout.split('\n'):
                                                 line2 = line2.strip()
@@ -353,7 +432,7 @@ class UniversalSMARTAgent:
                 
                 # Try lscpu for processor info as last resort
                 try:
-                    result = subprocess.run(['lscpu'], capture_output=True, text=True, timeout=5)
+                    result = _fast_run(['lscpu'], timeout=5)
                     if result.returncode == 0:
                         for line in result.stdout.split('\n'):
                             if 'Model name:' in line:
@@ -366,7 +445,7 @@ class UniversalSMARTAgent:
             elif system == 'darwin':
                 # Get Mac model
                 try:
-                    result = subprocess.run(['sysctl', '-n', 'hw.model'], capture_output=True, text=True)
+                    result = _fast_run(['sysctl', '-n', 'hw.model'])
                     if result.returncode == 0:
                         return result.stdout.strip()
                 except:
@@ -413,32 +492,9 @@ class UniversalSMARTAgent:
         # Get device model
         device_model = self.get_device_model()
         
-        # Get hardware info using psutil
-        # Hardware resources - require all or fail
+        # Hardware resources - require all or fail (probed once per process)
         try:
-            cpu_cores = psutil.cpu_count(logical=False) or psutil.cpu_count()
-            if not cpu_cores:
-                raise RuntimeError("Could not detect CPU core count")
-            
-            cpu_threads = psutil.cpu_count() or cpu_cores
-            
-            # Memory in GB
-            memory_bytes = psutil.virtual_memory().total
-            if not memory_bytes:
-                raise RuntimeError("Could not detect memory size")
-            memory_gb = round(memory_bytes / (1024**3), 1)
-            
-            # Storage in GB (main disk) - required, no fallback
-            # Get the main disk usage
-            if system == 'Windows':
-                storage = shutil.disk_usage('C:\\\\')
-            else:
-                storage = shutil.disk_usage('/')
-            storage_gb = round(storage.total / (1024**3), 0)
-            
-            if not storage_gb:
-                raise RuntimeError("Could not detect storage size")
-                
+            cpu_cores, cpu_threads, memory_gb, storage_gb = _probe_hardware()
         except Exception as e:
             logger.error(f"Hardware detection failed: {e}")
             raise RuntimeError(f"Hardware detection is required for agent operation: {e}")
@@ -464,12 +520,12 @@ class UniversalSMARTAgent:
         
         return platform_info
     
-    def create_broadcast_message(self) -> str:
-        """Create UDP broadcast message with platform information"""
+    def create_broadcast_message(self, iface: Optional[Dict] = None) -> str:
+        """Create UDP broadcast message with platform information (optionally for a specific interface)"""
         message = {
             'type': 'smart_agent_broadcast',
             'hostname': self.hostname,
-            'ip': self.local_ip,
+            'ip': iface['ip'] if iface else self.local_ip,
             'ssh_port': 22,  # Default SSH port
             'capabilities': ['python3', self.platform_info['platform']],
             'device_type': 'smart_node',
@@ -498,12 +554,22 @@ class UniversalSMARTAgent:
             }
         }
         
-        return json.dumps(message)
+        if iface:
+            message['interface'] = iface['interface']
+            message['interface_type'] = iface.get('type', 'other')
+        
+        # Compact separators - the hub only parses JSON, so strip the padding whitespace
+        return json.dumps(message, separators=(',', ':'))
     
     def broadcast_loop(self):
-        """Main broadcast loop - sends UDP discovery every 10 seconds on all interfaces"""
+        """Broadcast thread target - runs the asyncio broadcaster on its own event loop"""
+        asyncio.run(self._broadcast_coro())
+    
+    async def _broadcast_coro(self):
+        """Main broadcast coroutine - sends UDP discovery every 10 seconds on all interfaces"""
         device_name = self.platform_info.get('device_model') or self.hostname
         platform_name = self.platform_info['os']
+        loop = asyncio.get_running_loop()
         
         # Get all network interfaces
         interfaces = self.get_all_network_interfaces()
@@ -514,10 +580,11 @@ class UniversalSMARTAgent:
         for iface in interfaces:
             logger.info(f"   - {iface['interface']}: {iface['ip']} -> {iface['broadcast']}")
         
-        sockets = []
+        transports = []
         try:
-            # Create socket for each interface
+            # Create a datagram endpoint for each interface on the shared event loop
             for iface in interfaces:
+                sock = None
                 try:
                     sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
                     sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
@@ -527,28 +594,31 @@ class UniversalSMARTAgent:
                     except:
                         # If binding fails, use default binding
                         pass
-                    sockets.append((sock, iface))
+                    transport, protocol = await loop.create_datagram_endpoint(
+                        lambda iface=iface: _BroadcastProtocol(iface), sock=sock)
+                    transports.append((transport, protocol, iface))
                 except Exception as e:
                     logger.debug(f"Failed to create socket for {iface['interface']}: {e}")
+                    if sock is not None:
+                        sock.close()
             
             # Require at least one socket - no fallback
-            if not sockets:
+            if not transports:
                 raise RuntimeError("Failed to create broadcast sockets for any network interface. Cannot operate without network connectivity.")
             
             while self.running:
                 try:
                     # Broadcast on each interface
-                    for sock, iface in sockets:
+                    for transport, protocol, iface in transports:
                         try:
                             # Create message with interface-specific IP
-                            message_data = json.loads(self.create_broadcast_message())
-                            message_data['ip'] = iface['ip']
-                            message_data['interface'] = iface['interface']
-                            message_data['interface_type'] = iface.get('type', 'other')
-                            message = json.dumps(message_data)
+                            message = self.create_broadcast_message(iface)
                             
-                            sock.sendto(message.encode(), (iface['broadcast'], 8765))
-                            logger.debug(f"📡 Broadcasted: {platform_name} -> {iface['interface']} ({iface['ip']})")
+                            # Send errors are reported through protocol.error_received, not raised
+                            protocol.last_error = None
+                            transport.sendto(message.encode(), (iface['broadcast'], 8765))
+                            if protocol.last_error is None:
+                                logger.debug(f"📡 Broadcasted: {platform_name} -> {iface['interface']} ({iface['ip']})")
                             
                         except Exception as e:
                             logger.debug(f"Broadcast error on {iface['interface']}: {e}")
@@ -556,15 +626,15 @@ class UniversalSMARTAgent:
                 except Exception as e:
                     logger.error(f"Broadcast loop error: {e}")
                 
-                time.sleep(10)  # Broadcast every 10 seconds
+                await asyncio.sleep(10)  # Broadcast every 10 seconds
                 
         except Exception as e:
             logger.error(f"Broadcast setup failed: {e}")
         finally:
-            # Close all sockets
-            for sock, iface in sockets:
+            # Close all transports (closes the underlying sockets)
+            for transport, protocol, iface in transports:
                 try:
-                    sock.close()
+                    transport.close()
                 except:
                     pass
             logger.info("Broadcast stopped")